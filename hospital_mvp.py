@@ -11,17 +11,96 @@ Features:
 Run: python hospital_mvp.py
 """
 
+import atexit
+import csv
+import functools
+import itertools
+import pathlib
+import queue
 import sqlite3
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 from datetime import datetime
 import os
 
 DB_FILE = os.path.join(os.path.dirname(__file__), "hospital_mvp.db")
+MAX_INVOICE_AMOUNT = 1_000_000  # pounds; keeps pence, and their SUM, well inside SQLite's int64
+PAGE_SIZE = 200  # rows fetched per page for the appointment/consultation lists
+_conn = None  # shared read/write connection, opened lazily by get_conn()
+_ro_conn = None  # shared read-only connection for SELECTs, opened lazily by get_read_conn()
+_ro_lock = threading.Lock()  # the Tk thread and list workers take turns on _ro_conn
+# Applied to every new connection (several PRAGMAs are per-connection).
+# WAL mode keeps hospital_mvp.db-wal / hospital_mvp.db-shm next to the DB file.
+DB_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-20000;
+"""
+
+# --- SQL statements (module constants so sqlite3's statement cache reuses them) ---
+SQL_BEGIN_IMMEDIATE = "BEGIN IMMEDIATE"
+SQL_INSERT_PATIENT = "INSERT INTO patients (first_name,last_name,dob,phone,notes) VALUES (?,?,?,?,?)"
+SQL_LIST_PATIENTS = "SELECT id, first_name || ' ' || last_name AS name, dob, phone FROM patients ORDER BY id DESC"
+SQL_GET_PATIENT = "SELECT id, first_name, last_name, dob, phone, notes FROM patients WHERE id=?"
+SQL_PATIENT_IDS = "SELECT id FROM patients ORDER BY id"
+SQL_ANY_PATIENTS = "SELECT EXISTS (SELECT 1 FROM patients)"
+SQL_INSERT_APPOINTMENT = "INSERT INTO appointments (patient_id,doctor,datetime,reason) VALUES (?,?,?,?)"
+SQL_LIST_APPOINTMENTS = """SELECT a.id, p.first_name || ' ' || p.last_name AS patient, a.doctor, a.datetime, a.reason, a.status
+                 FROM appointments a JOIN patients p ON a.patient_id=p.id ORDER BY a.datetime DESC, a.id
+                 LIMIT ? OFFSET ?"""
+SQL_APPOINTMENT_PATIENT = "SELECT patient_id FROM appointments WHERE id=?"
+SQL_COMPLETE_APPOINTMENT = "UPDATE appointments SET status='completed' WHERE id=?"
+SQL_INSERT_CONSULTATION = """INSERT INTO consultations (appointment_id,patient_id,doctor,notes,prescription)
+                 VALUES (?,?,?,?,?)"""
+SQL_LIST_CONSULTATIONS = """SELECT c.id, p.first_name || ' ' || p.last_name AS patient, c.doctor, c.created_at, c.prescription
+                 FROM consultations c JOIN patients p ON c.patient_id=p.id ORDER BY c.created_at DESC, c.id
+                 LIMIT ? OFFSET ?"""
+SQL_INSERT_INVOICE = "INSERT INTO invoices (patient_id,appointment_id,amount_pence) VALUES (?,?,?)"
+SQL_LIST_INVOICES = """SELECT i.id, p.first_name || ' ' || p.last_name AS patient, printf('£%s%d.%02d', CASE WHEN i.amount_pence < 0 THEN '-' ELSE '' END,
+                        abs(i.amount_pence) / 100, abs(i.amount_pence) % 100) AS amount_fmt,
+                 i.issued_at, CASE WHEN i.paid THEN 'Yes' ELSE 'No' END AS paid
+                 FROM invoices i JOIN patients p ON i.patient_id=p.id ORDER BY i.issued_at DESC"""
+SQL_TOGGLE_INVOICE_PAID = "UPDATE invoices SET paid = 1 - paid WHERE id=?"
+SQL_MARK_SEEDED = "INSERT OR IGNORE INTO meta (key, value) VALUES ('seeded', '1')"
+SQL_DASHBOARD_STATS = """SELECT (SELECT COUNT(*) FROM patients), (SELECT COUNT(*) FROM appointments),
+                 (SELECT COUNT(*) FROM consultations), (SELECT COUNT(*) FROM invoices),
+                 (SELECT IFNULL(SUM(amount_pence),0) FROM invoices)"""
+
+# --- Schema ---
+# Timestamps are filled in by SQLite (local time, ISO-8601 like datetime.isoformat())
+TIMESTAMP_DEFAULT = "(strftime('%Y-%m-%dT%H:%M:%f','now','localtime'))"
+DDL_CONSULTATIONS = f"""
+        CREATE TABLE IF NOT EXISTS consultations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            appointment_id INTEGER,
+            patient_id INTEGER,
+            doctor TEXT,
+            notes TEXT,
+            prescription TEXT,
+            created_at TEXT DEFAULT {TIMESTAMP_DEFAULT},
+            FOREIGN KEY(appointment_id) REFERENCES appointments(id),
+            FOREIGN KEY(patient_id) REFERENCES patients(id)
+        )
+    """
+DDL_INVOICES = f"""
+        CREATE TABLE IF NOT EXISTS invoices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            patient_id INTEGER,
+            appointment_id INTEGER,
+            amount_pence INTEGER NOT NULL,
+            issued_at TEXT DEFAULT {TIMESTAMP_DEFAULT},
+            paid INTEGER DEFAULT 0,
+            FOREIGN KEY(patient_id) REFERENCES patients(id),
+            FOREIGN KEY(appointment_id) REFERENCES appointments(id)
+        )
+    """
 
 # --- Database helpers ---
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_conn()
     c = conn.cursor()
     c.execute("""
         CREATE TABLE IF NOT EXISTS patients (
@@ -44,110 +123,162 @@ def init_db():
             FOREIGN KEY(patient_id) REFERENCES patients(id)
         )
     """)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS consultations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            appointment_id INTEGER,
-            patient_id INTEGER,
-            doctor TEXT,
-            notes TEXT,
-            prescription TEXT,
-            created_at TEXT,
-            FOREIGN KEY(appointment_id) REFERENCES appointments(id),
-            FOREIGN KEY(patient_id) REFERENCES patients(id)
-        )
-    """)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS invoices (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            patient_id INTEGER,
-            appointment_id INTEGER,
-            amount REAL,
-            issued_at TEXT,
-            paid INTEGER DEFAULT 0,
-            FOREIGN KEY(patient_id) REFERENCES patients(id),
-            FOREIGN KEY(appointment_id) REFERENCES appointments(id)
-        )
-    """)
+    c.execute(DDL_CONSULTATIONS)
+    c.execute(DDL_INVOICES)
+    c.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    # Tables created by older versions (no timestamp defaults, REAL amounts) are rebuilt once
+    if _table_columns(conn, "consultations")["created_at"] is None:
+        _rebuild_table(conn, "consultations", DDL_CONSULTATIONS)
+    inv = _table_columns(conn, "invoices")
+    if "amount_pence" not in inv or inv["issued_at"] is None:
+        _rebuild_table(conn, "invoices", DDL_INVOICES, {"amount_pence": "CAST(ROUND(IFNULL(amount,0) * 100) AS INTEGER)"})
+    # Indexes backing the JOIN + ORDER BY in the list_* queries
+    c.execute("CREATE INDEX IF NOT EXISTS idx_appointments_datetime ON appointments(datetime DESC)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_appointments_patient ON appointments(patient_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_consultations_created ON consultations(created_at DESC)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_consultations_patient ON consultations(patient_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_invoices_issued ON invoices(issued_at DESC)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_invoices_patient ON invoices(patient_id)")
+    # ANALYZE once, as soon as there is data to describe (empty tables leave sqlite_stat1 empty);
+    # later launches skip the full scan
+    has_stats = (c.execute("SELECT 1 FROM sqlite_master WHERE name='sqlite_stat1'").fetchone()
+                 and c.execute("SELECT 1 FROM sqlite_stat1 LIMIT 1").fetchone())
+    if not has_stats: c.execute("ANALYZE")
     conn.commit()
-    conn.close()
+
+def _table_columns(conn, table):
+    # column name -> declared DEFAULT (None when there is none)
+    return {r[1]: r[4] for r in conn.execute(f"PRAGMA table_info({table})")}
+
+def _rebuild_table(conn, table, ddl, exprs=None):
+    # SQLite cannot ALTER a column's type or DEFAULT, so copy the rows into a freshly created
+    # table. exprs maps a new column missing from the old table to a SELECT expression.
+    old, exprs = _table_columns(conn, table), exprs or {}
+    with conn:
+        conn.execute(SQL_BEGIN_IMMEDIATE)
+        conn.execute(ddl.replace(f"IF NOT EXISTS {table}", f"{table}_new"))
+        cols = [col for col in _table_columns(conn, f"{table}_new") if col in old or col in exprs]
+        select = ",".join(col if col in old else exprs[col] for col in cols)
+        conn.execute(f"INSERT INTO {table}_new ({','.join(cols)}) SELECT {select} FROM {table}")
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
 
 def get_conn():
-    return sqlite3.connect(DB_FILE)
+    # Single long-lived connection; callers must not close it (closed at exit)
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(DB_FILE, cached_statements=256)
+        _conn.row_factory = sqlite3.Row
+        _conn.executescript(DB_PRAGMAS)
+        atexit.register(_conn.close)
+    return _conn
+
+def get_read_conn():
+    # Read-only twin of get_conn(); in WAL mode its readers never block the writer
+    global _ro_conn
+    if _ro_conn is None:
+        _ro_conn = sqlite3.connect(pathlib.Path(DB_FILE).as_uri() + "?mode=ro", uri=True,
+                                   cached_statements=256, check_same_thread=False)
+        _ro_conn.row_factory = sqlite3.Row
+        _ro_conn.executescript(DB_PRAGMAS)
+        atexit.register(_ro_conn.close)
+    return _ro_conn
+
+def read_rows(sql, params=()):
+    with _ro_lock:
+        return get_read_conn().execute(sql, params).fetchall()
 
 # --- Core operations ---
 def add_patient(first, last, dob, phone, notes=""):
     conn = get_conn(); c = conn.cursor()
-    c.execute("INSERT INTO patients (first_name,last_name,dob,phone,notes) VALUES (?,?,?,?,?)",
-              (first,last,dob,phone,notes))
-    conn.commit(); pid = c.lastrowid; conn.close()
+    c.execute(SQL_INSERT_PATIENT, (first,last,dob,phone,notes))
+    conn.commit(); pid = c.lastrowid
+    get_patient.cache_clear()
     return pid
 
+def add_patients_bulk(rows):
+    # rows: (first, last, dob, phone, notes) tuples, inserted in one transaction.
+    # Callers importing large files should chunk at ~1000 rows per call.
+    conn = get_conn()
+    with conn:
+        n = conn.executemany(SQL_INSERT_PATIENT, rows).rowcount
+    get_patient.cache_clear()
+    return n
+
 def list_patients():
-    conn = get_conn(); c = conn.cursor()
-    c.execute("SELECT id, first_name, last_name, dob, phone FROM patients ORDER BY id DESC")
-    rows = c.fetchall(); conn.close(); return rows
+    return read_rows(SQL_LIST_PATIENTS)
 
+@functools.lru_cache(maxsize=512)  # cleared whenever patients are added
 def get_patient(pid):
-    conn = get_conn(); c = conn.cursor()
-    c.execute("SELECT id, first_name, last_name, dob, phone, notes FROM patients WHERE id=?", (pid,))
-    r = c.fetchone(); conn.close(); return r
+    rows = read_rows(SQL_GET_PATIENT, (pid,))
+    return rows[0] if rows else None
 
 def add_appointment(patient_id, doctor, dt_str, reason):
     conn = get_conn(); c = conn.cursor()
-    c.execute("INSERT INTO appointments (patient_id,doctor,datetime,reason) VALUES (?,?,?,?)",
-              (patient_id,doctor,dt_str,reason))
-    conn.commit(); aid = c.lastrowid; conn.close(); return aid
+    c.execute(SQL_INSERT_APPOINTMENT, (patient_id,doctor,dt_str,reason))
+    conn.commit(); aid = c.lastrowid; return aid
 
-def list_appointments():
-    conn = get_conn(); c = conn.cursor()
-    c.execute("""SELECT a.id, p.first_name || ' ' || p.last_name AS patient, a.doctor, a.datetime, a.reason, a.status
-                 FROM appointments a JOIN patients p ON a.patient_id=p.id ORDER BY a.datetime DESC""")
-    rows = c.fetchall(); conn.close(); return rows
+def appt_patient_id(aid):
+    return read_rows(SQL_APPOINTMENT_PATIENT, (aid,))[0][0]
 
-def add_consultation(appointment_id, patient_id, doctor, notes, prescription):
-    conn = get_conn(); c = conn.cursor()
-    created_at = datetime.now().isoformat()
-    c.execute("""INSERT INTO consultations (appointment_id,patient_id,doctor,notes,prescription,created_at)
-                 VALUES (?,?,?,?,?,?)""", (appointment_id,patient_id,doctor,notes,prescription,created_at))
-    c.execute("UPDATE appointments SET status='completed' WHERE id=?", (appointment_id,))
-    conn.commit(); cid = c.lastrowid; conn.close(); return cid
+def list_appointments(limit=PAGE_SIZE, offset=0):
+    return read_rows(SQL_LIST_APPOINTMENTS, (limit, offset))
 
-def list_consultations():
-    conn = get_conn(); c = conn.cursor()
-    c.execute("""SELECT c.id, p.first_name || ' ' || p.last_name AS patient, c.doctor, c.created_at, c.prescription
-                 FROM consultations c JOIN patients p ON c.patient_id=p.id ORDER BY c.created_at DESC""")
-    rows = c.fetchall(); conn.close(); return rows
+def add_consultation(appointment_id, patient_id, doctor, notes, prescription):
+    conn = get_conn()
+    with conn:
+        # take the write lock up front instead of upgrading from a read lock mid-transaction
+        conn.execute(SQL_BEGIN_IMMEDIATE)
+        cid = conn.execute(SQL_INSERT_CONSULTATION, (appointment_id,patient_id,doctor,notes,prescription)).lastrowid
+        conn.execute(SQL_COMPLETE_APPOINTMENT, (appointment_id,))
+    return cid
+
+def list_consultations(limit=PAGE_SIZE, offset=0):
+    return read_rows(SQL_LIST_CONSULTATIONS, (limit, offset))
+
+def to_pence(amount):
+    # invoice amounts are stored as whole pence, rounded half away from zero like the
+    # migration's SQLite ROUND() (Python's round() would round half to even)
+    pence = int(abs(amount) * 100 + 0.5)
+    return pence if amount >= 0 else -pence
 
 def generate_invoice(patient_id, appointment_id, amount):
     conn = get_conn(); c = conn.cursor()
-    issued_at = datetime.now().isoformat()
-    c.execute("INSERT INTO invoices (patient_id,appointment_id,amount,issued_at) VALUES (?,?,?,?)",
-              (patient_id,appointment_id,amount,issued_at))
-    conn.commit(); iid = c.lastrowid; conn.close(); return iid
+    c.execute(SQL_INSERT_INVOICE, (patient_id,appointment_id,to_pence(amount)))
+    conn.commit(); iid = c.lastrowid; return iid
 
 def list_invoices():
-    conn = get_conn(); c = conn.cursor()
-    c.execute("""SELECT i.id, p.first_name || ' ' || p.last_name AS patient, i.amount, i.issued_at, i.paid
-                 FROM invoices i JOIN patients p ON i.patient_id=p.id ORDER BY i.issued_at DESC""")
-    rows = c.fetchall(); conn.close(); return rows
+    return read_rows(SQL_LIST_INVOICES)
+
+def flip_invoice_paid(iid):
+    conn = get_conn()
+    conn.execute(SQL_TOGGLE_INVOICE_PAID, (iid,)); conn.commit()
+
+def dashboard_stats():
+    # (patients, appointments, consultations, invoice count, invoice total) in one query
+    return read_rows(SQL_DASHBOARD_STATS)[0]
 
 # --- Sample seed ---
 def seed_sample_data():
     conn = get_conn(); c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM patients"); ifc = c.fetchone()[0]
-    if ifc > 0:
-        conn.close(); return
-    c.execute("INSERT INTO patients (first_name,last_name,dob,phone,notes) VALUES (?,?,?,?,?)",
-              ("Alice","Wong","1985-04-12","+441234567890","Allergic to penicillin"))
-    c.execute("INSERT INTO patients (first_name,last_name,dob,phone,notes) VALUES (?,?,?,?,?)",
-              ("Bob","Smith","1990-11-03","+447700900123","Diabetic"))
-    conn.commit()
-    c.execute("INSERT INTO appointments (patient_id,doctor,datetime,reason) VALUES (?,?,?,?)",
-              (1,"Dr. Patel", datetime.now().isoformat(), "Routine checkup"))
-    c.execute("INSERT INTO appointments (patient_id,doctor,datetime,reason) VALUES (?,?,?,?)",
-              (2,"Dr. Jones", datetime.now().isoformat(), "Follow-up"))
-    conn.commit(); conn.close()
+    patients = [
+        ("Alice","Wong","1985-04-12","+441234567890","Allergic to penicillin"),
+        ("Bob","Smith","1990-11-03","+447700900123","Diabetic"),
+    ]
+    with conn:  # one transaction for the flag and the whole seed
+        # primary-key lookup on the 'seeded' flag instead of counting patients each launch
+        if c.execute(SQL_MARK_SEEDED).rowcount == 0:
+            return
+        # databases from before the meta table: existing patients mean already seeded
+        if c.execute(SQL_ANY_PATIENTS).fetchone()[0]:
+            return
+        c.executemany(SQL_INSERT_PATIENT, patients)
+        # table was empty, so the seeded rows are all of them, in insert order
+        pid1, pid2 = [r[0] for r in c.execute(SQL_PATIENT_IDS)]
+        now = datetime.now().isoformat()
+        c.executemany(SQL_INSERT_APPOINTMENT,
+                      [(pid1,"Dr. Patel", now, "Routine checkup"),
+                       (pid2,"Dr. Jones", now, "Follow-up")])
 
 # --- GUI ---
 class HospitalApp(tk.Tk):
@@ -155,7 +286,12 @@ class HospitalApp(tk.Tk):
         super().__init__()
         self.title("Hospital MVP - Python/Tkinter")
         self.geometry("900x600")
+        self.load_stats()
+        self._pages = {}  # tree -> paging state for lists loaded page by page
+        self._loads = {}  # tree -> token of the latest refresh for unpaged lists
+        self._results = queue.Queue()  # (callback, arg) pairs posted by worker threads
         self.create_widgets()
+        self._drain_results()
 
     def create_widgets(self):
         notebook = ttk.Notebook(self); notebook.pack(fill="both", expand=True)
@@ -172,6 +308,84 @@ class HospitalApp(tk.Tk):
         self.create_billing_tab(self.bill_frame)
         self.create_admin_tab(self.admin_frame)
 
+    def _reload_tree(self, tree, rows, seen=None):
+        # Clear in one Tcl call; the row id (first value) doubles as the item iid.
+        # Rows may be sqlite3.Row, which Tk needs as a plain tuple.
+        tree.delete(*tree.get_children())
+        self._append_rows(tree, rows, seen)
+
+    def _append_rows(self, tree, rows, seen=None):
+        # seen: iids already in a paged tree; pages can overlap if rows were added meanwhile
+        for row in rows:
+            iid = str(row[0])
+            if seen is not None:
+                if iid in seen: continue
+                seen.add(iid)
+            tree.insert("", "end", iid=iid, values=tuple(row))
+
+    def _selected_id(self, tree):
+        # _reload_tree/_append_rows use the record id as the item iid, so no cell lookup is needed
+        sel = tree.selection()
+        return int(sel[0]) if sel else None
+
+    def _bind_paging(self, tree, fetch):
+        # fetch(offset=...) returns one page; the next page loads when the view hits the bottom
+        self._pages[tree] = {'fetch': fetch}
+        tree.configure(yscrollcommand=lambda first, last: self._on_tree_scroll(tree, last))
+
+    def _refresh_paged(self, tree):
+        state = self._pages[tree] = {'fetch': self._pages[tree]['fetch'], 'offset': 0, 'done': False, 'loading': True,
+                                     'seen': set()}
+        self._load_async(lambda: state['fetch'](offset=0), lambda rows: self._apply_page(tree, state, rows, reset=True),
+                         lambda error: self._page_failed(tree, state, error))
+
+    def _apply_page(self, tree, state, rows, reset=False):
+        if self._pages[tree] is not state: return  # a newer refresh superseded this page
+        if reset: state['seen'].clear(); self._reload_tree(tree, rows, state['seen'])
+        else: self._append_rows(tree, rows, state['seen'])
+        state['offset'] += len(rows); state['done'] = len(rows) < PAGE_SIZE; state['loading'] = False
+
+    def _page_failed(self, tree, state, error):
+        # let the next scroll retry instead of leaving the tree stuck in 'loading'
+        state['loading'] = False
+        if self._pages[tree] is state: self._report_load_error(error)
+
+    def _on_tree_scroll(self, tree, last):
+        state = self._pages[tree]
+        if float(last) < 1.0 or state.get('done', True) or state['loading']: return
+        state['loading'] = True; offset = state['offset']
+        # offset 0 means the refresh's first page failed and the old rows are still shown: reload
+        self._load_async(lambda: state['fetch'](offset=offset), lambda rows: self._apply_page(tree, state, rows, reset=offset == 0),
+                         lambda error: self._page_failed(tree, state, error))
+
+    def _load_async(self, fetch, apply, failed=None):
+        # Run fetch() on a worker thread; its rows go to apply() (or the error to failed())
+        # via _results, since Tk may only be called from the Tk thread
+        def work():
+            try: rows = fetch()
+            except Exception as e:
+                self._results.put((failed or self._report_load_error, e)); return
+            self._results.put((apply, rows))
+        threading.Thread(target=work, daemon=True).start()
+
+    def _drain_results(self):
+        # Poll on the Tk thread; reschedule first so a failing callback does not stop polling
+        self.after(50, self._drain_results)
+        while True:
+            try: callback, arg = self._results.get_nowait()
+            except queue.Empty: return
+            callback(arg)
+
+    def _report_load_error(self, error):
+        messagebox.showerror("Database", f"Could not load records: {error}")
+
+    def _refresh_tree(self, tree, fetch):
+        # Reload an unpaged tree; only the most recent refresh of each tree is applied
+        token = self._loads[tree] = object()
+        def apply(rows):
+            if self._loads[tree] is token: self._reload_tree(tree, rows)
+        self._load_async(fetch, apply)
+
     # Patients tab
     def create_patients_tab(self, parent):
         left = ttk.Frame(parent); left.pack(side="left", fill="y", padx=8, pady=8)
@@ -182,6 +396,7 @@ class HospitalApp(tk.Tk):
         ttk.Entry(left, textvariable=self.dob).pack(fill="x", pady=2)
         ttk.Entry(left, textvariable=self.phone).pack(fill="x", pady=2)
         ttk.Button(left, text="Add Patient", command=self.handle_add_patient).pack(pady=6)
+        ttk.Button(left, text="Import CSV", command=self.handle_import_csv).pack(pady=2)
         ttk.Button(left, text="Refresh", command=self.refresh_patient_list).pack(pady=2)
         cols = ("id","name","dob","phone")
         self.pat_tree = ttk.Treeview(right, columns=cols, show="headings")
@@ -197,21 +412,42 @@ class HospitalApp(tk.Tk):
         pid = add_patient(first,last,dob,phone)
         messagebox.showinfo("Added", f"Patient {first} {last} added (id {pid})")
         self.fn.set(""); self.ln.set(""); self.dob.set(""); self.phone.set("")
+        self._stats['patients'] += 1
         self.refresh_patient_list(); self.refresh_admin()
 
+    def handle_import_csv(self):
+        path = filedialog.askopenfilename(title="Import patients", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not path: return
+        fields = ("first_name", "last_name", "dob", "phone", "notes")
+        total = 0
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                reader = csv.DictReader(f)
+                if not {"first_name", "last_name"} <= set(reader.fieldnames or ()):
+                    messagebox.showerror("Import", "CSV needs a header row with first_name and last_name columns"); return
+                rows = (tuple((r.get(k) or "").strip() for k in fields) for r in reader)
+                rows = (r for r in rows if r[0] and r[1])
+                while chunk := list(itertools.islice(rows, 1000)):
+                    n = add_patients_bulk(chunk)
+                    # each chunk is its own transaction, so count it as soon as it commits
+                    total += n; self._stats['patients'] += n
+        except (OSError, UnicodeDecodeError, csv.Error, sqlite3.Error) as e:
+            messagebox.showerror("Import", f"Import stopped after {total} patients: {e}")
+        else:
+            messagebox.showinfo("Imported", f"{total} patients imported")
+        finally:
+            if total: self.refresh_patient_list(); self.refresh_admin()
+
     def refresh_patient_list(self):
-        for r in self.pat_tree.get_children(): self.pat_tree.delete(r)
-        for pid,f,l,dob,phone in list_patients():
-            self.pat_tree.insert("", "end", values=(pid, f" {f} {l}", dob, phone))
+        self._refresh_tree(self.pat_tree, list_patients)
 
     def show_patient_details(self, event):
-        sel = self.pat_tree.selection()
-        if not sel: return
-        pid = self.pat_tree.item(sel[0])["values"][0]
+        pid = self._selected_id(self.pat_tree)
+        if pid is None: return
         data = get_patient(pid)
         if not data: return
-        id_, f, l, dob, phone, notes = data
-        messagebox.showinfo("Patient Details", f"ID: {id_}\nName: {f} {l}\nDOB: {dob}\nPhone: {phone}\nNotes: {notes}")
+        messagebox.showinfo("Patient Details", f"ID: {data['id']}\nName: {data['first_name']} {data['last_name']}\n"
+                                               f"DOB: {data['dob']}\nPhone: {data['phone']}\nNotes: {data['notes']}")
 
     # Appointments tab
     def create_appointments_tab(self, parent):
@@ -223,6 +459,7 @@ class HospitalApp(tk.Tk):
         for c in cols: self.appt_tree.heading(c, text=c.title())
         self.appt_tree.pack(fill="both", expand=True, padx=8, pady=8)
         self.appt_tree.bind("<Double-1>", self.open_appointment_actions)
+        self._bind_paging(self.appt_tree, list_appointments)
         self.refresh_appt_list()
 
     def new_appointment_dialog(self):
@@ -234,22 +471,22 @@ class HospitalApp(tk.Tk):
         dt = simpledialog.askstring("Date/time", "Enter datetime", initialvalue=datetime.now().isoformat())
         reason = simpledialog.askstring("Reason", "Reason for appointment")
         add_appointment(pid, doctor, dt, reason or "Consultation")
+        self._stats['appts'] += 1
         self.refresh_appt_list(); self.refresh_admin()
 
     def refresh_appt_list(self):
-        for r in self.appt_tree.get_children(): self.appt_tree.delete(r)
-        for row in list_appointments(): self.appt_tree.insert("", "end", values=row)
+        self._refresh_paged(self.appt_tree)
 
     def open_appointment_actions(self, event):
-        sel = self.appt_tree.selection()
-        if not sel: return
-        aid, patient, doctor, dt, reason, status = self.appt_tree.item(sel[0])["values"]
+        aid = self._selected_id(self.appt_tree)
+        if aid is None: return
+        doctor = self.appt_tree.set(str(aid), "doctor")
         if messagebox.askyesno("Appointment", f"Mark appointment {aid} as consultation?"):
             notes = simpledialog.askstring("Notes", "Consultation notes")
             presc = simpledialog.askstring("Prescription", "Prescription")
-            conn = get_conn(); c = conn.cursor()
-            c.execute("SELECT patient_id FROM appointments WHERE id=?", (aid,)); pid = c.fetchone()[0]; conn.close()
+            pid = appt_patient_id(aid)
             add_consultation(aid, pid, doctor, notes or "", presc or "")
+            self._stats['cons'] += 1
             self.refresh_appt_list(); self.refresh_consult_list(); self.refresh_admin()
 
     # Consultations tab
@@ -260,11 +497,11 @@ class HospitalApp(tk.Tk):
         self.cons_tree = ttk.Treeview(parent, columns=cols, show="headings")
         for c in cols: self.cons_tree.heading(c, text=c.title())
         self.cons_tree.pack(fill="both", expand=True, padx=8, pady=8)
+        self._bind_paging(self.cons_tree, list_consultations)
         self.refresh_consult_list()
 
     def refresh_consult_list(self):
-        for r in self.cons_tree.get_children(): self.cons_tree.delete(r)
-        for row in list_consultations(): self.cons_tree.insert("", "end", values=row)
+        self._refresh_paged(self.cons_tree)
 
     # Billing tab
     def create_billing_tab(self, parent):
@@ -283,40 +520,44 @@ class HospitalApp(tk.Tk):
         if not appts:
             messagebox.showwarning("No appointments", "No appointments to invoice"); return
         aid = appts[0][0]
-        pid = get_conn().execute("SELECT patient_id FROM appointments WHERE id=?", (aid,)).fetchone()[0]
-        amount = simpledialog.askfloat("Amount", "Invoice amount", initialvalue=50.0)
+        pid = appt_patient_id(aid)
+        amount = simpledialog.askfloat("Amount", "Invoice amount", initialvalue=50.0,
+                                        minvalue=0, maxvalue=MAX_INVOICE_AMOUNT)
+        if amount is None: return
+        if not 0 <= amount <= MAX_INVOICE_AMOUNT:  # also false for nan
+            messagebox.showerror("Validation", f"Invoice amount must be between 0 and {MAX_INVOICE_AMOUNT:,}"); return
         generate_invoice(pid, aid, amount)
+        self._stats['inv_count'] += 1; self._stats['inv_pence'] += to_pence(amount)
         self.refresh_invoice_list(); self.refresh_admin()
 
     def refresh_invoice_list(self):
-        for r in self.inv_tree.get_children(): self.inv_tree.delete(r)
-        for id_, patient, amount, issued_at, paid in list_invoices():
-            self.inv_tree.insert("", "end", values=(id_, patient, f"£{amount:.2f}", issued_at, "Yes" if paid else "No"))
+        self._refresh_tree(self.inv_tree, list_invoices)
 
     def toggle_invoice_paid(self, event):
-        sel = self.inv_tree.selection()
-        if not sel: return
-        iid = self.inv_tree.item(sel[0])["values"][0]
-        conn = get_conn(); c = conn.cursor()
-        c.execute("SELECT paid FROM invoices WHERE id=?", (iid,)); paid = c.fetchone()[0]
-        c.execute("UPDATE invoices SET paid=? WHERE id=?", (0 if paid else 1, iid)); conn.commit(); conn.close()
+        iid = self._selected_id(self.inv_tree)
+        if iid is None: return
+        flip_invoice_paid(iid)
         self.refresh_invoice_list(); self.refresh_admin()
 
     # Admin dashboard
     def create_admin_tab(self, parent):
         self.stats_text = tk.Text(parent, height=10, state="disabled")
         self.stats_text.pack(fill="both", expand=True, padx=8, pady=8)
-        ttk.Button(parent, text="Refresh", command=self.refresh_admin).pack()
+        ttk.Button(parent, text="Force recount", command=self.recount_admin).pack()
         self.refresh_admin()
 
+    def load_stats(self):
+        # Counters are kept in memory and bumped by the mutating handlers
+        patients, appts, cons, inv_count, inv_pence = dashboard_stats()
+        self._stats = {'patients': patients, 'appts': appts, 'cons': cons, 'inv_count': inv_count, 'inv_pence': inv_pence}
+
+    def recount_admin(self):
+        self.load_stats(); self.refresh_admin()
+
     def refresh_admin(self):
-        conn = get_conn(); c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM patients"); patients = c.fetchone()[0]
-        c.execute("SELECT COUNT(*) FROM appointments"); appts = c.fetchone()[0]
-        c.execute("SELECT COUNT(*) FROM consultations"); cons = c.fetchone()[0]
-        c.execute("SELECT COUNT(*), IFNULL(SUM(amount),0) FROM invoices"); inv_count, inv_sum = c.fetchone()
-        conn.close()
-        txt = f"Patients: {patients}\nAppointments: {appts}\nConsultations: {cons}\nInvoices: {inv_count}\nRevenue: £{inv_sum:.2f}\n"
+        s = self._stats
+        patients, appts, cons, inv_count, inv_pence = s['patients'], s['appts'], s['cons'], s['inv_count'], s['inv_pence']
+        txt = f"Patients: {patients}\nAppointments: {appts}\nConsultations: {cons}\nInvoices: {inv_count}\nRevenue: £{inv_pence / 100:.2f}\n"
         self.stats_text.configure(state="normal"); self.stats_text.delete("1.0","end"); self.stats_text.insert("1.0", txt); self.stats_text.configure(state="disabled")
 
 if __name__ == '__main__':